@@ -0,0 +1,71 @@
+import json
+import os
+import sys
+from decimal import Decimal
+
+import boto3
+from botocore.exceptions import ClientError
+
+
+# Table read by prod_get_device_statistics.py
+TABLE_NAME = 'prod_device_aggregates'
+DEFAULT_DATA_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), '..', '..', 'public', 'data', 'AggregatedDeviceData.json'
+)
+
+
+def create_table_if_missing(dynamodb):
+    """
+    Create the aggregates table (hash key 'deviceId', range key 'period') if it does not exist yet.
+    """
+    try:
+        table = dynamodb.Table(TABLE_NAME)
+        table.load()
+        return table
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'ResourceNotFoundException':
+            raise
+
+    print(f"Creating table {TABLE_NAME}")
+    table = dynamodb.create_table(
+        TableName=TABLE_NAME,
+        KeySchema=[
+            {'AttributeName': 'deviceId', 'KeyType': 'HASH'},
+            {'AttributeName': 'period', 'KeyType': 'RANGE'}
+        ],
+        AttributeDefinitions=[
+            {'AttributeName': 'deviceId', 'AttributeType': 'S'},
+            {'AttributeName': 'period', 'AttributeType': 'S'}
+        ],
+        BillingMode='PAY_PER_REQUEST'
+    )
+    table.wait_until_exists()
+    return table
+
+
+def load_aggregates(path):
+    # DynamoDB rejects floats, so parse numbers straight into Decimal
+    with open(path) as f:
+        return json.load(f, parse_float=Decimal)
+
+
+def main(path=DEFAULT_DATA_PATH):
+    dynamodb = boto3.resource('dynamodb')
+    table = create_table_if_missing(dynamodb)
+    rows = load_aggregates(path)
+
+    # Overwrite on the (deviceId, period) key so the script can be re-run after each aggregation
+    with table.batch_writer(overwrite_by_pkeys=['deviceId', 'period']) as batch:
+        for row in rows:
+            batch.put_item(Item={
+                'deviceId': row['deviceId'],
+                'period': row['period'],
+                'times_on': row['times_on'],
+                'total_time_on': row['total_time_on']
+            })
+
+    print(f"Loaded {len(rows)} rows into {TABLE_NAME}")
+
+
+if __name__ == '__main__':
+    main(*sys.argv[1:2])
@@ -0,0 +1,293 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from decimal import Decimal
+
+import boto3
+from boto3.dynamodb.conditions import Key
+from botocore.exceptions import ClientError
+
+
+# Initialize DynamoDB resources once per container so warm invocations reuse them
+dynamodb = boto3.resource('dynamodb')
+DEVICES_TABLE_NAME = 'prod_devices'
+USERS_TABLE_NAME = 'prod_users'
+devices_table = dynamodb.Table(DEVICES_TABLE_NAME)
+users_table = dynamodb.Table(USERS_TABLE_NAME)
+
+# Rows of AggregatedDeviceData.json, keyed by 'deviceId' (hash) and 'period' (range,
+# 'day#YYYY-MM-DD' / 'month#YYYY-MM' / 'year#YYYY'). Created and loaded by load_device_aggregates.py
+AGGREGATES_TABLE_NAME = 'prod_device_aggregates'
+
+# boto3 resources are not thread-safe, so each worker thread gets its own table handle
+AGGREGATE_QUERY_WORKERS = 8
+aggregate_query_executor = ThreadPoolExecutor(max_workers=AGGREGATE_QUERY_WORKERS)
+thread_local = threading.local()
+
+# Finished statistics keyed by (userId, startDate, endDate, today)
+CACHE_TTL_SECONDS = 300
+CACHE_MAX_ENTRIES = 256
+stats_cache = {}
+
+
+def lambda_handler(event, context):
+    # Handle CORS preflight request
+    if event.get('httpMethod') == 'OPTIONS':
+        return generate_response(200, {})
+
+    query_params = event.get('queryStringParameters') or {}
+    user_id = query_params.get('userId')
+    start_date = query_params.get('startDate')
+    end_date = query_params.get('endDate')
+    # Optional client-side current date; defaults to the Lambda's UTC date
+    today_date = query_params.get('today')
+
+    # Validate input parameters
+    missing_params = [param for param in ['userId', 'startDate', 'endDate'] if not query_params.get(param)]
+    if missing_params:
+        return generate_response(400, {'message': f'Missing required parameters: {", ".join(missing_params)}'})
+
+    try:
+        start = datetime.strptime(start_date, '%Y-%m-%d').date()
+        end = datetime.strptime(end_date, '%Y-%m-%d').date()
+        today = datetime.strptime(today_date, '%Y-%m-%d').date() if today_date else datetime.now(timezone.utc).date()
+    except ValueError:
+        return generate_response(400, {'message': 'startDate, endDate and today must be formatted as YYYY-MM-DD'})
+
+    if start > end:
+        return generate_response(400, {'message': 'startDate must not be after endDate'})
+
+    # Normalize to zero-padded dates so '2024-1-5' and '2024-01-05' share the key range and cache entry
+    start_date = start.isoformat()
+    end_date = end.isoformat()
+
+    cache_key = (user_id, start_date, end_date, today.isoformat())
+    cached = stats_cache.get(cache_key)
+    if cached and time.time() - cached[0] < CACHE_TTL_SECONDS:
+        return generate_response(200, {'data': cached[1]})
+
+    try:
+        base_rate = get_base_rate(user_id)
+        if base_rate is None:
+            return generate_response(404, {'message': f"User with userId '{user_id}' not found."})
+
+        devices = query_devices(user_id)
+        day_entries = query_day_entries(devices.keys(), start_date, end_date)
+
+        stats = compute_statistics(devices, day_entries, base_rate, count_elapsed_days(start, end, today))
+        stats['startDate'] = start_date
+        stats['endDate'] = end_date
+        stats['today'] = today.isoformat()
+    except ClientError as e:
+        print(f"Error fetching statistics for user {user_id}: {e.response['Error']['Message']}")
+        return generate_response(500, {'message': 'Internal server error'})
+    except Exception as e:
+        print(f"Error computing statistics for user {user_id}: {e}")
+        return generate_response(500, {'message': 'Internal server error'})
+
+    store_in_cache(cache_key, stats)
+    return generate_response(200, {'data': stats})
+
+
+def count_elapsed_days(start, end, today=None):
+    """
+    Number of days in the window up to and including today. Days after today
+    cannot have data yet, so they are left out of the per-day average.
+    Without a client date, today is the Lambda's UTC date, which runs ahead
+    of the local date for users west of UTC late in their evening.
+    """
+    today = today or datetime.now(timezone.utc).date()
+    last_day = min(end, today)
+    return max((last_day - start).days + 1, 0)
+
+
+def query_devices(user_id):
+    """
+    Return the user's devices from prod_devices, indexed by deviceId.
+    """
+    devices = {}
+    query_params = {'KeyConditionExpression': Key('userId').eq(user_id)}
+
+    while True:
+        response = devices_table.query(**query_params)
+        for item in response.get('Items', []):
+            devices[item['deviceId']] = convert_decimal_to_num(item)
+
+        last_evaluated_key = response.get('LastEvaluatedKey')
+        if not last_evaluated_key:
+            break
+        query_params['ExclusiveStartKey'] = last_evaluated_key
+
+    return devices
+
+
+def get_base_rate(user_id):
+    """
+    Return the user's base rate per kWh, or None if the user does not exist.
+    """
+    response = users_table.get_item(Key={'userId': user_id})
+    if 'Item' not in response:
+        return None
+
+    rate = response['Item'].get('baseRatePerKWh', 0)
+    try:
+        return float(rate)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def get_aggregates_table():
+    if not hasattr(thread_local, 'aggregates_table'):
+        thread_local.aggregates_table = boto3.session.Session().resource('dynamodb').Table(AGGREGATES_TABLE_NAME)
+    return thread_local.aggregates_table
+
+
+def query_device_day_entries(device_id, start_date, end_date):
+    """
+    Fetch the 'day#YYYY-MM-DD' aggregates inside the window for one device,
+    using the (deviceId, period) key instead of scanning the whole table.
+    """
+    table = get_aggregates_table()
+    rows = []
+    query_params = {
+        'KeyConditionExpression': Key('deviceId').eq(device_id)
+        & Key('period').between(f'day#{start_date}', f'day#{end_date}'),
+        'ProjectionExpression': '#pd, times_on, total_time_on',
+        'ExpressionAttributeNames': {'#pd': 'period'}
+    }
+
+    while True:
+        response = table.query(**query_params)
+        rows.extend(response.get('Items', []))
+
+        last_evaluated_key = response.get('LastEvaluatedKey')
+        if not last_evaluated_key:
+            break
+        query_params['ExclusiveStartKey'] = last_evaluated_key
+
+    return rows
+
+
+def query_day_entries(device_ids, start_date, end_date):
+    """
+    Run the per-device queries concurrently and return the rows indexed by deviceId.
+    """
+    device_ids = list(device_ids)
+    results = aggregate_query_executor.map(
+        lambda device_id: query_device_day_entries(device_id, start_date, end_date),
+        device_ids
+    )
+    return dict(zip(device_ids, results))
+
+
+def compute_statistics(devices, day_entries, base_rate, elapsed_days):
+    """
+    Build the per-device statistics payload in a single pass over each
+    device's daily aggregates.
+
+    averageTimeOnPerDay is total on-time divided by elapsed_days ('days' in
+    the payload), the days of the window up to today (the client's 'today'
+    parameter, or the UTC date; see count_elapsed_days), so days without any
+    usage still count towards the average. The peak day is the day with the
+    most on-time; ties go to the earliest day. Values are kept unrounded
+    until the payload is built: seconds to 1 decimal, kWh and cost to 2,
+    percentages to 1.
+    """
+    device_stats = []
+
+    for device_id, device in devices.items():
+        wattage = float(device.get('wattageOn', 0) or 0)
+        total_time_on = 0.0
+        times_on = 0
+        peak_day = None
+        peak_time_on = 0.0
+
+        for entry in day_entries.get(device_id, []):
+            seconds = float(entry.get('total_time_on', 0))
+            day = entry['period'].split('#', 1)[1]
+            total_time_on += seconds
+            times_on += int(entry.get('times_on', 0))
+            if seconds > peak_time_on or (seconds == peak_time_on and peak_day and day < peak_day):
+                peak_time_on = seconds
+                peak_day = day
+
+        kwh = wattage * total_time_on / (1000 * 3600)
+
+        device_stats.append({
+            'deviceId': device_id,
+            'name': device.get('label', device_id),
+            'type': device.get('category', ''),
+            'totalTimeOn': total_time_on,
+            'averageTimeOnPerDay': total_time_on / elapsed_days if elapsed_days > 0 else 0.0,
+            'timesOn': times_on,
+            'kwh': kwh,
+            'cost': kwh * base_rate,
+            'peakDay': peak_day,
+            'peakDayKwh': wattage * peak_time_on / (1000 * 3600)
+        })
+
+    total_time_on = sum(stat['totalTimeOn'] for stat in device_stats)
+    total_kwh = sum(stat['kwh'] for stat in device_stats)
+    total_cost = sum(stat['cost'] for stat in device_stats)
+
+    for stat in device_stats:
+        stat['percentage'] = round(stat['kwh'] / total_kwh * 100, 1) if total_kwh > 0 else 0.0
+
+    device_stats.sort(key=lambda stat: stat['kwh'], reverse=True)
+
+    for stat in device_stats:
+        stat['totalTimeOn'] = round(stat['totalTimeOn'], 1)
+        stat['averageTimeOnPerDay'] = round(stat['averageTimeOnPerDay'], 1)
+        stat['kwh'] = round(stat['kwh'], 2)
+        stat['cost'] = round(stat['cost'], 2)
+        stat['peakDayKwh'] = round(stat['peakDayKwh'], 2)
+
+    return {
+        'days': elapsed_days,
+        'baseRatePerKWh': base_rate,
+        'totals': {
+            'totalTimeOn': round(total_time_on, 1),
+            'timesOn': sum(stat['timesOn'] for stat in device_stats),
+            'kwh': round(total_kwh, 2),
+            'cost': round(total_cost, 2)
+        },
+        'devices': device_stats
+    }
+
+
+def store_in_cache(cache_key, stats):
+    if len(stats_cache) >= CACHE_MAX_ENTRIES:
+        # Evict the oldest entry to keep container memory bounded
+        oldest_key = min(stats_cache, key=lambda key: stats_cache[key][0])
+        del stats_cache[oldest_key]
+    stats_cache[cache_key] = (time.time(), stats)
+
+
+def convert_decimal_to_num(obj):
+    if isinstance(obj, list):
+        return [convert_decimal_to_num(i) for i in obj]
+    elif isinstance(obj, dict):
+        return {k: convert_decimal_to_num(v) for k, v in obj.items()}
+    elif isinstance(obj, Decimal):
+        # Convert Decimal to int if it's a whole number, or float if it has a fractional part
+        if obj % 1 == 0:
+            return int(obj)
+        else:
+            return float(obj)
+    else:
+        return obj
+
+
+def generate_response(status_code, body):
+    return {
+        'statusCode': status_code,
+        'headers': {
+            'Content-Type': 'application/json',
+            'Access-Control-Allow-Origin': '*',  # Replace '*' with specific origins for better security
+            'Access-Control-Allow-Methods': 'GET, OPTIONS',
+            'Access-Control-Allow-Headers': 'Content-Type'
+        },
+        'body': json.dumps(body)
+    }
@@ -0,0 +1,189 @@
+import json
+import sys
+import unittest
+from datetime import date
+from decimal import Decimal
+from unittest import mock
+
+
+class ClientError(Exception):
+    def __init__(self, error_response, operation_name):
+        super().__init__(error_response['Error']['Message'])
+        self.response = error_response
+
+
+# The Lambda builds its DynamoDB resources at import time, so import it against
+# stand-in AWS modules; every test patches the functions that would reach DynamoDB
+with mock.patch.dict(sys.modules, {
+    'boto3': mock.MagicMock(),
+    'boto3.dynamodb': mock.MagicMock(),
+    'boto3.dynamodb.conditions': mock.MagicMock(),
+    'botocore': mock.MagicMock(),
+    'botocore.exceptions': mock.MagicMock(ClientError=ClientError),
+}):
+    import prod_get_device_statistics as statistics
+    from prod_get_device_statistics import compute_statistics, count_elapsed_days
+
+
+class ComputeStatisticsTest(unittest.TestCase):
+
+    def test_empty_window(self):
+        devices = {'device1': {'deviceId': 'device1', 'label': 'Fridge', 'category': 'kitchen', 'wattageOn': 150}}
+
+        stats = compute_statistics(devices, {}, 0.15, 30)
+
+        self.assertEqual(stats['totals'], {'totalTimeOn': 0.0, 'timesOn': 0, 'kwh': 0.0, 'cost': 0.0})
+        device = stats['devices'][0]
+        self.assertEqual(device['kwh'], 0.0)
+        self.assertEqual(device['averageTimeOnPerDay'], 0.0)
+        self.assertEqual(device['percentage'], 0.0)
+        self.assertIsNone(device['peakDay'])
+
+    def test_peak_day_tie_goes_to_earliest_day(self):
+        devices = {'device1': {'deviceId': 'device1', 'label': 'TV', 'wattageOn': 100}}
+        entries = {'device1': [
+            {'period': 'day#2024-01-03', 'times_on': 1, 'total_time_on': 3600},
+            {'period': 'day#2024-01-01', 'times_on': 2, 'total_time_on': 3600},
+            {'period': 'day#2024-01-02', 'times_on': 1, 'total_time_on': 1800},
+        ]}
+
+        device = compute_statistics(devices, entries, 0.2, 3)['devices'][0]
+
+        self.assertEqual(device['peakDay'], '2024-01-01')
+        self.assertEqual(device['peakDayKwh'], 0.1)
+        self.assertEqual(device['timesOn'], 4)
+        self.assertEqual(device['totalTimeOn'], 9000.0)
+        self.assertEqual(device['averageTimeOnPerDay'], 3000.0)
+
+    def test_decimal_inputs(self):
+        devices = {'device1': {'deviceId': 'device1', 'label': 'Heater', 'wattageOn': Decimal('1500')}}
+        entries = {'device1': [
+            {'period': 'day#2024-01-01', 'times_on': Decimal('3'), 'total_time_on': Decimal('7200.0')},
+        ]}
+
+        stats = compute_statistics(devices, entries, 0.1, 1)
+
+        device = stats['devices'][0]
+        self.assertEqual(device['kwh'], 3.0)
+        self.assertEqual(device['cost'], 0.3)
+        self.assertEqual(device['timesOn'], 3)
+        self.assertEqual(device['percentage'], 100.0)
+
+    def test_totals_use_unrounded_values(self):
+        # Each device uses 0.004 kWh, which rounds to 0.0 on its own
+        devices = {f'device{i}': {'deviceId': f'device{i}', 'wattageOn': 4} for i in range(10)}
+        entries = {device_id: [{'period': 'day#2024-01-01', 'times_on': 1, 'total_time_on': 3600}]
+                   for device_id in devices}
+
+        stats = compute_statistics(devices, entries, 1.0, 1)
+
+        self.assertEqual(stats['totals']['kwh'], 0.04)
+        self.assertEqual(stats['totals']['cost'], 0.04)
+        self.assertTrue(all(device['percentage'] == 10.0 for device in stats['devices']))
+
+    def test_elapsed_days_stop_at_today(self):
+        today = date(2024, 1, 15)
+
+        self.assertEqual(count_elapsed_days(date(2024, 1, 1), date(2024, 1, 31), today), 15)
+        self.assertEqual(count_elapsed_days(date(2023, 12, 1), date(2023, 12, 31), today), 31)
+        self.assertEqual(count_elapsed_days(date(2024, 2, 1), date(2024, 2, 29), today), 0)
+
+
+class LambdaHandlerTest(unittest.TestCase):
+
+    def setUp(self):
+        statistics.stats_cache.clear()
+
+        devices = {'device1': {'deviceId': 'device1', 'label': 'TV', 'wattageOn': 100}}
+        entries = {'device1': [{'period': 'day#2024-01-05', 'times_on': 2, 'total_time_on': 7200}]}
+
+        patchers = [
+            mock.patch.object(statistics, 'get_base_rate', return_value=0.15),
+            mock.patch.object(statistics, 'query_devices', return_value=devices),
+            mock.patch.object(statistics, 'query_day_entries', return_value=entries),
+        ]
+        self.get_base_rate, self.query_devices, self.query_day_entries = [p.start() for p in patchers]
+        for patcher in patchers:
+            self.addCleanup(patcher.stop)
+
+    def invoke(self, **params):
+        params.setdefault('userId', 'user1')
+        return statistics.lambda_handler({'httpMethod': 'GET', 'queryStringParameters': params}, None)
+
+    def test_dates_are_normalized(self):
+        first = self.invoke(startDate='2024-1-5', endDate='2024-1-31', today='2024-1-10')
+        second = self.invoke(startDate='2024-01-05', endDate='2024-01-31', today='2024-01-10')
+
+        self.assertEqual(first['statusCode'], 200)
+        data = json.loads(first['body'])['data']
+        self.assertEqual((data['startDate'], data['endDate'], data['today']), ('2024-01-05', '2024-01-31', '2024-01-10'))
+        self.assertEqual(data['days'], 6)
+        self.query_day_entries.assert_called_once_with(mock.ANY, '2024-01-05', '2024-01-31')
+        self.assertEqual(json.loads(second['body']), json.loads(first['body']))
+        self.assertEqual(list(statistics.stats_cache), [('user1', '2024-01-05', '2024-01-31', '2024-01-10')])
+
+    def test_start_after_end_is_rejected(self):
+        response = self.invoke(startDate='2024-02-01', endDate='2024-01-01')
+
+        self.assertEqual(response['statusCode'], 400)
+        self.query_devices.assert_not_called()
+
+    def test_missing_parameters_are_rejected(self):
+        response = statistics.lambda_handler({'queryStringParameters': {'startDate': '2024-01-01'}}, None)
+
+        self.assertEqual(response['statusCode'], 400)
+        self.assertEqual(json.loads(response['body']), {'message': 'Missing required parameters: userId, endDate'})
+
+    def test_cached_result_is_served_within_ttl(self):
+        with mock.patch.object(statistics.time, 'time', return_value=1000.0):
+            self.invoke(startDate='2024-01-01', endDate='2024-01-31', today='2024-01-31')
+            self.invoke(startDate='2024-01-01', endDate='2024-01-31', today='2024-01-31')
+        self.assertEqual(self.query_devices.call_count, 1)
+        self.assertEqual(self.query_day_entries.call_count, 1)
+
+        with mock.patch.object(statistics.time, 'time', return_value=1000.0 + statistics.CACHE_TTL_SECONDS):
+            self.invoke(startDate='2024-01-01', endDate='2024-01-31', today='2024-01-31')
+        self.assertEqual(self.query_devices.call_count, 2)
+
+    def test_unknown_user_returns_404_and_is_not_cached(self):
+        self.get_base_rate.return_value = None
+
+        response = self.invoke(userId='ghost', startDate='2024-01-01', endDate='2024-01-31')
+
+        self.assertEqual(response['statusCode'], 404)
+        self.query_devices.assert_not_called()
+        self.assertEqual(statistics.stats_cache, {})
+
+    def test_unexpected_error_returns_500_with_cors_headers(self):
+        with mock.patch.object(statistics, 'compute_statistics', side_effect=ValueError('bad aggregate')):
+            response = self.invoke(startDate='2024-01-01', endDate='2024-01-31')
+
+        self.assertEqual(response['statusCode'], 500)
+        self.assertEqual(response['headers']['Access-Control-Allow-Origin'], '*')
+        self.assertEqual(json.loads(response['body']), {'message': 'Internal server error'})
+        self.assertEqual(statistics.stats_cache, {})
+
+    def test_client_error_returns_500(self):
+        self.query_devices.side_effect = ClientError({'Error': {'Code': 'ResourceNotFoundException', 'Message': 'missing'}}, 'Query')
+
+        response = self.invoke(startDate='2024-01-01', endDate='2024-01-31')
+
+        self.assertEqual(response['statusCode'], 500)
+        self.assertEqual(json.loads(response['body']), {'message': 'Internal server error'})
+
+
+class GetBaseRateTest(unittest.TestCase):
+
+    def test_unknown_user_has_no_rate(self):
+        with mock.patch.object(statistics, 'users_table') as users_table:
+            users_table.get_item.return_value = {}
+            self.assertIsNone(statistics.get_base_rate('ghost'))
+
+    def test_rate_is_read_as_float(self):
+        with mock.patch.object(statistics, 'users_table') as users_table:
+            users_table.get_item.return_value = {'Item': {'userId': 'user1', 'baseRatePerKWh': '0.15'}}
+            self.assertEqual(statistics.get_base_rate('user1'), 0.15)
+
+
+if __name__ == '__main__':
+    unittest.main()